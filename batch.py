@@ -0,0 +1,84 @@
+#this module evaluates many Tic Tac Toe boards at once with NumPy, instead of looking at one board at a time
+#a batch is an int8 array of shape (N, 9), one row per board, with 1 for 'X', -1 for 'O' and 0 for an empty square
+#NumPy is only needed by this module; the game, the players and the simulator work without it
+#usage example: python batch.py 100000
+import sys #here is imported sys to read the command line arguments
+import time #here is imported time to measure the speed of the lockstep games
+import numpy as np #here is imported NumPy, which does the work on all the boards in single array operations
+from board import Board, WIN_LINES #here are imported the headless board and its winning lines
+
+X, O, EMPTY = 1, -1, 0 #here are the values stored in the squares of a batch
+#here are the squares of the 8 winning lines as an (8, 3) index array
+LINES = np.array([[i for i in range(9) if line >> i & 1] for line in WIN_LINES], dtype=np.intp)
+
+def to_batch(states):
+    #this function converts a list of Board objects into a batch
+    boards = np.zeros((len(states), 9), dtype=np.int8)
+    for row, state in enumerate(states):
+        for square in range(9):
+            boards[row, square] = X if state.x_mask >> square & 1 else O if state.o_mask >> square & 1 else EMPTY
+    return boards
+
+def to_board(row):
+    #this function converts one row of a batch back into a Board object
+    state = Board()
+    for square in range(9):
+        if row[square] == X:
+            state.make_move(square, 'X')
+        elif row[square] == O:
+            state.make_move(square, 'O')
+    return state
+
+def winners(boards):
+    #this function returns, for every board, 1 if 'X' has a complete line, -1 if 'O' has one and 0 otherwise
+    sums = boards[:, LINES].sum(axis=2, dtype=np.int8) #the sum of each line is 3 or -3 only when one player owns it all
+    x_won = (sums == 3).any(axis=1)
+    o_won = (sums == -3).any(axis=1)
+    return x_won.astype(np.int8) - o_won.astype(np.int8)
+
+def legal_moves(boards):
+    #this function returns a boolean (N, 9) array that is True on the empty squares of every board
+    return boards == EMPTY
+
+def empty_counts(boards):
+    #this function returns the number of empty squares of every board
+    return legal_moves(boards).sum(axis=1)
+
+def random_moves(boards, rng):
+    #this function picks a random empty square on every board, like RandomComputerPlayer, and returns -1 for full boards
+    #each empty square gets a random key and the square with the largest key wins, which is a uniform choice among them
+    keys = rng.random(boards.shape)
+    legal = legal_moves(boards)
+    keys[~legal] = -1.0
+    moves = keys.argmax(axis=1)
+    moves[~legal.any(axis=1)] = -1
+    return moves
+
+def play_random_games(count, rng, first=X):
+    #this function plays count random-vs-random games in lockstep and returns the winner of each one (1, -1 or 0 for a tie)
+    #each of the at most 9 turns makes one move on every board that is still being played
+    boards = np.zeros((count, 9), dtype=np.int8)
+    results = np.zeros(count, dtype=np.int8)
+    active = np.ones(count, dtype=bool)
+    letter = first
+    rows = np.arange(count)
+    for _ in range(9):
+        playing = rows[active]
+        moves = random_moves(boards[playing], rng)
+        boards[playing, moves] = letter
+        results[playing] = winners(boards[playing])
+        #a board stops being played when somebody has won or when it's full
+        active[playing] = (results[playing] == 0) & (moves != -1) & (empty_counts(boards[playing]) > 0)
+        if not active.any():
+            break
+        letter = -letter
+    return results
+
+if __name__ == '__main__':
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    results = play_random_games(games, rng)
+    elapsed = time.perf_counter() - start
+    print(f"{games} random games in {elapsed:.3f} s ({games / elapsed:.0f} games/s)")
+    print(f"X wins: {(results == X).mean():.2%}  O wins: {(results == O).mean():.2%}  ties: {(results == EMPTY).mean():.2%}")
@@ -0,0 +1,183 @@
+#this module benchmarks the players and the board, and compares the results with a saved baseline
+#usage example: python bench.py --output results.json            (run and save the results)
+#               python bench.py --baseline results.json          (run and compare with earlier results)
+import argparse #here is imported argparse to read the command line options
+import json #here is imported json to save and load the results
+import platform #here is imported platform to record where the benchmark ran
+import random #here is imported random to fix the seed of the games and the positions
+import statistics #here is imported statistics to summarize the timings
+import sys #here is imported sys to set the exit code
+import time #here is imported time to measure the timings
+from board import Board #here is imported the headless game state
+from book import legal_positions, shared_book #here are imported the generator of every position where a game is still going on, and the table of solved positions
+from player import SmartComputerPlayer, RandomComputerPlayer, TranspositionTable #here are imported the players to measure
+from simulate import play_game #here is imported the function that plays one headless game
+
+#these are the settings of a run that must match the baseline for the results to be comparable
+COMPARABLE_META = ('positions', 'games', 'repeats', 'search', 'book')
+
+def summarize(samples, unit, higher_is_better=False):
+    #this function returns the statistics of a list of timings: median, 95th percentile and standard deviation
+    ordered = sorted(samples)
+    return {
+        'unit': unit,
+        'samples': len(ordered),
+        'median': statistics.median(ordered),
+        'p95': ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        'stdev': statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        'higher_is_better': higher_is_better,
+    }
+
+def distinct_positions():
+    #this function returns every position where a game is still going on, one per group of symmetric positions,
+    #leaving out the empty board (where the smart player picks a random square without searching)
+    positions = {}
+    for x_mask, o_mask, letter in legal_positions():
+        if not x_mask | o_mask:
+            continue
+        state = Board()
+        state.x_mask, state.o_mask = x_mask, o_mask
+        positions.setdefault((state.canonical()[0], letter), (state, letter))
+    return list(positions.values())
+
+def bench_moves(positions, search, use_book):
+    #this function times get_move once on every position, cold (an empty cache every time), warm (a cache filled by a
+    #first pass over all positions) and, if it has been built, with the table of solved positions, in microseconds
+    results = {}
+    cold = []
+    for state, letter in positions:
+        player = SmartComputerPlayer(letter, table=TranspositionTable(), search=search, book=None)
+        start = time.perf_counter()
+        player.get_move(state)
+        cold.append((time.perf_counter() - start) * 1e6)
+    results[f'get_move_cold_{search}'] = summarize(cold, 'us')
+
+    table = TranspositionTable(max_size=None)
+    players = {letter: SmartComputerPlayer(letter, table=table, search=search, book=None) for letter in 'XO'}
+    for state, letter in positions:
+        players[letter].get_move(state) #the first pass fills the cache
+    warm = []
+    for state, letter in positions:
+        start = time.perf_counter()
+        players[letter].get_move(state)
+        warm.append((time.perf_counter() - start) * 1e6)
+    results[f'get_move_warm_{search}'] = summarize(warm, 'us')
+
+    if not use_book:
+        return results #without the table, this would only time the search again
+    players = {letter: SmartComputerPlayer(letter, table=None, book=shared_book) for letter in 'XO'}
+    book = []
+    for state, letter in positions:
+        start = time.perf_counter()
+        players[letter].get_move(state)
+        book.append((time.perf_counter() - start) * 1e6)
+    results['get_move_book'] = summarize(book, 'us')
+    return results
+
+def bench_games(games, repeats, use_book):
+    #this function measures how many full games per second are played, smart against random and smart against smart
+    #every repeat starts with empty caches, so the repeats don't get faster by reusing what earlier repeats found
+    results = {}
+    book = shared_book if use_book else None
+    for name, o_class in (('smart_vs_random', RandomComputerPlayer), ('smart_vs_smart', SmartComputerPlayer)):
+        samples = []
+        for repeat in range(repeats):
+            random.seed(repeat)
+            x_player = SmartComputerPlayer('X', table=TranspositionTable(), book=book)
+            if o_class is SmartComputerPlayer:
+                o_player = SmartComputerPlayer('O', table=TranspositionTable(), book=book)
+            else:
+                o_player = o_class('O')
+            start = time.perf_counter()
+            for index in range(games):
+                play_game(x_player, o_player, 'X' if index % 2 == 0 else 'O')
+            samples.append(games / (time.perf_counter() - start))
+        results[f'games_{name}'] = summarize(samples, 'games/s', higher_is_better=True)
+    return results
+
+def bench_board(positions, repeats, loops):
+    #this function measures single calls of check_winner and available_moves over a sample of positions, in nanoseconds
+    sample = [state for state, _ in random.Random(0).sample(positions, min(200, len(positions)))]
+    results = {}
+    for name, call in (('check_winner', lambda state: state.check_winner('X')),
+                       ('available_moves', lambda state: state.available_moves())):
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for _ in range(loops):
+                for state in sample:
+                    call(state)
+            samples.append((time.perf_counter() - start) / (loops * len(sample)) * 1e9)
+        results[name] = summarize(samples, 'ns')
+    return results
+
+def compare(results, baseline, tolerance):
+    #this function prints the change of every benchmark against the baseline and returns the names that got worse
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            print(f"{name:28} {current['median']:14.2f} {current['unit']:8} (not in baseline)")
+            continue
+        ratio = current['median'] / previous['median'] if previous['median'] else float('inf')
+        #a ratio above 1 is a slowdown for timings, but a speedup for throughputs
+        worse = ratio < 1 - tolerance if current['higher_is_better'] else ratio > 1 + tolerance
+        if worse:
+            regressions.append(name)
+        print(f"{name:28} {current['median']:14.2f} {current['unit']:8} {ratio:6.2f}x baseline{'  REGRESSION' if worse else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Tic Tac Toe players and board.")
+    parser.add_argument('--output', help="file to save the results to, as JSON")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare with")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="relative change of the median counted as a regression")
+    parser.add_argument('--search', choices=['minimax', 'alphabeta'], default='minimax', help="search used by the move benchmarks")
+    parser.add_argument('--quick', action='store_true', help="fewer games and repeats, for a fast check")
+    args = parser.parse_args()
+
+    positions = distinct_positions()
+    games, repeats, loops = (100, 3, 20) if args.quick else (1000, 7, 200)
+    use_book = shared_book.load() #the results depend on whether the table of solved positions has been built
+    meta = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'positions': len(positions),
+        'games': games,
+        'repeats': repeats,
+        'search': args.search,
+        'book': use_book,
+    }
+
+    #here is checked that the baseline was run the same way, otherwise the comparison would be meaningless
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        different = [key for key in COMPARABLE_META if baseline.get('meta', {}).get(key) != meta[key]]
+        if different:
+            for key in different:
+                print(f"{key}: baseline {baseline.get('meta', {}).get(key)!r}, this run {meta[key]!r}")
+            print("the baseline was run with different settings, so it can't be compared (build or remove tictactoe.book to match)")
+            sys.exit(2)
+
+    results = {}
+    results.update(bench_moves(positions, args.search, use_book))
+    results.update(bench_games(games, repeats, use_book))
+    results.update(bench_board(positions, repeats, loops))
+    report = {'meta': meta, 'results': results}
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+    else:
+        regressions = []
+        for name, result in results.items():
+            print(f"{name:28} median {result['median']:12.2f}  p95 {result['p95']:12.2f}  stdev {result['stdev']:10.2f} {result['unit']}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
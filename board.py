@@ -0,0 +1,227 @@
+#this module defines the game state of Tic Tac Toe without any graphical interface
+#the board is stored as two integers used as bit masks, one for the squares taken by 'X' and one for the squares taken by 'O'
+#bit i of a mask is set when square i (numbered row by row, starting at 0) is taken by that player
+#the classic game is played on a 3x3 board with 3 in a row, but any size from 3x3 up to 7x7 with any win length can be used
+from functools import lru_cache #here is imported lru_cache so the lines of each board size are only computed once
+
+MAX_SIZE = 7 #here is the largest supported number of rows and columns
+
+def square_symmetries(size):
+    #this function returns the 8 symmetries of a square board (4 rotations and 4 reflections)
+    #entry i of each tuple holds the square of the original board that lands on square i after the transform
+    last = size - 1
+    maps = (
+        lambda r, c: (r, c), #identity
+        lambda r, c: (last - c, r), #rotation by 90 degrees clockwise
+        lambda r, c: (last - r, last - c), #rotation by 180 degrees
+        lambda r, c: (c, last - r), #rotation by 270 degrees clockwise
+        lambda r, c: (r, last - c), #reflection left to right
+        lambda r, c: (last - r, c), #reflection top to bottom
+        lambda r, c: (c, r), #reflection on the main diagonal
+        lambda r, c: (last - c, last - r), #reflection on the anti-diagonal
+    )
+    symmetries = []
+    for transform in maps:
+        perm = []
+        for square in range(size * size):
+            row, col = transform(*divmod(square, size))
+            perm.append(row * size + col)
+        symmetries.append(tuple(perm))
+    return tuple(symmetries)
+
+def winning_lines(size, win_length):
+    #this function returns the masks of every run of win_length squares in a row, column or diagonal
+    lines = []
+    for row in range(size):
+        for col in range(size):
+            for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)): #right, down, down-right and down-left
+                end_row, end_col = row + d_row * (win_length - 1), col + d_col * (win_length - 1)
+                if 0 <= end_row < size and 0 <= end_col < size:
+                    lines.append(sum(1 << ((row + d_row * i) * size + col + d_col * i) for i in range(win_length)))
+    return tuple(lines)
+
+#this class holds everything about a board size that never changes during a game: lines, symmetries and lookup tables
+#use geometry() to get one, so every board of the same size shares the same instance
+class Geometry:
+    def __init__(self, size, win_length):
+        #here is checked that the size and the win length make a playable game
+        #the size is also capped at 7x7, the largest board the depth-limited search is meant to play on
+        if not 3 <= size <= MAX_SIZE or not 3 <= win_length <= size:
+            raise ValueError(f"the board must be between 3x3 and {MAX_SIZE}x{MAX_SIZE} and the win length must be between 3 and the board size")
+        self.size = size #here is stored the number of rows (and columns)
+        self.win_length = win_length #here is stored how many letters in a row are needed to win
+        self.cells = size * size #here is stored the number of squares
+        self.full_mask = (1 << self.cells) - 1 #here is stored the mask with all the squares taken
+        self.lines = winning_lines(size, win_length) #here are stored the masks of all the winning lines
+        #here are stored, for every square, only the lines that go through it, so a move can be checked against just those
+        self.lines_through = tuple(tuple(line for line in self.lines if line >> square & 1) for square in range(self.cells))
+        #here is stored, for every square, the mask of the squares around it (including itself)
+        self.neighbors = tuple(
+            sum(1 << (r * size + c)
+                for r in range(max(0, row - 1), min(size, row + 2))
+                for c in range(max(0, col - 1), min(size, col + 2)))
+            for row, col in (divmod(square, size) for square in range(self.cells))
+        )
+        #here are stored the squares sorted from the center outwards, which is the order moves are tried in by default
+        middle = (size - 1) / 2
+        self.center_order = tuple(sorted(range(self.cells), key=lambda square: (
+            (square // size - middle) ** 2 + (square % size - middle) ** 2, square)))
+        self.symmetries = square_symmetries(size)
+        #here is precomputed the inverse of every symmetry, so a square of the original board can be mapped into the transformed board
+        self.inverse_symmetries = tuple(tuple(perm.index(i) for i in range(self.cells)) for perm in self.symmetries)
+        small = self.cells <= 9 #small boards get a lookup table over every possible mask
+        #here is stored, for each mask of empty squares, the list of those squares (small boards only)
+        self.squares = tuple(tuple(i for i in range(self.cells) if mask >> i & 1) for mask in range(1 << self.cells)) if small else None
+        #here is stored, for every symmetry, a table with the transformed mask of every possible mask (small boards only)
+        self.symmetry_tables = tuple(
+            tuple(sum(1 << i for i in range(self.cells) if mask >> perm[i] & 1) for mask in range(1 << self.cells))
+            for perm in self.symmetries
+        ) if small else None
+
+def geometry(size=3, win_length=None):
+    #this function returns the shared Geometry of a board size; the win length defaults to the board size
+    return cached_geometry(size, size if win_length is None else win_length)
+
+@lru_cache(maxsize=None)
+def cached_geometry(size, win_length):
+    #this function keeps one Geometry per size and win length, so geometry(3) and geometry(3, 3) are the same object
+    return Geometry(size, win_length)
+
+#these are the tables of the classic 3x3 board, which other modules use directly
+CLASSIC = geometry(3, 3)
+WIN_LINES = CLASSIC.lines #here are the masks of the 8 winning lines (3 rows, 3 columns and 2 diagonals)
+FULL_MASK = CLASSIC.full_mask #here is the mask with all 9 squares taken
+#here is precomputed, for each of the 512 possible masks, whether it contains a complete line
+WINNING = tuple(any(mask & line == line for line in WIN_LINES) for mask in range(512))
+SQUARES = CLASSIC.squares #here is, for each of the 512 possible masks of empty squares, the list of those squares
+
+#this class defines a headless Tic Tac Toe board, used by the GUI, the AI players and any other front end
+class Board:
+    #the attributes are fixed, which keeps every board small when many games are held in memory at once
+    __slots__ = ('geometry', 'size', 'win_length', 'x_mask', 'o_mask', 'current_winner')
+
+    def __init__(self, size=3, win_length=None):
+        self.geometry = geometry(size, win_length) #here are stored the lines and tables of this board size
+        self.size = self.geometry.size #here is stored the number of rows (and columns)
+        self.win_length = self.geometry.win_length #here is stored how many letters in a row are needed to win
+        self.x_mask = 0 #here are stored the squares taken by 'X'
+        self.o_mask = 0 #here are stored the squares taken by 'O'
+        self.current_winner = None #here is stored the letter of the winner, or None while nobody has won
+
+    @property
+    def classic(self):
+        #this property tells if this is the classic 3x3 board with 3 in a row
+        return self.geometry is CLASSIC
+
+    @property
+    def num_squares(self):
+        #this property returns the total number of squares of the board
+        return self.geometry.cells
+
+    @property
+    def board(self):
+        #this property returns the board as a list of strings ('X', 'O' or ' '), which is handy for display
+        return [self.letter_at(square) for square in range(self.geometry.cells)]
+
+    def letter_at(self, square):
+        #this method returns the letter placed on a square, or ' ' if the square is empty
+        bit = 1 << square
+        if self.x_mask & bit:
+            return 'X'
+        if self.o_mask & bit:
+            return 'O'
+        return ' '
+
+    def make_move(self, square, letter):
+        #this method places the letter on the square, if the square is empty
+        bit = 1 << square
+        if (self.x_mask | self.o_mask) & bit:
+            return False #return False if the move was invalid (the square was already taken)
+        if letter == 'X':
+            self.x_mask |= bit
+            mask = self.x_mask
+        else:
+            self.o_mask |= bit
+            mask = self.o_mask
+        #only the lines through the new letter can have been completed by this move
+        for line in self.geometry.lines_through[square]:
+            if mask & line == line:
+                self.current_winner = letter #set the current winner to the player who made the move
+                break
+        return True #return True indicating the move was successful
+
+    def undo_move(self, square):
+        #this method removes the letter placed on the square, which is used by the AI to take back simulated moves
+        bit = ~(1 << square)
+        self.x_mask &= bit
+        self.o_mask &= bit
+        self.current_winner = None #clear the winner, since a finished game stops at the winning move
+
+    def is_winning_move(self, square, letter):
+        #this method checks if placing the letter on the empty square would complete a line, without changing the board
+        mask = (self.x_mask if letter == 'X' else self.o_mask) | 1 << square
+        for line in self.geometry.lines_through[square]:
+            if mask & line == line:
+                return True
+        return False
+
+    def available_moves(self):
+        #this method returns the indices of the empty squares
+        empty = self.geometry.full_mask & ~(self.x_mask | self.o_mask)
+        if self.geometry.squares is not None:
+            return self.geometry.squares[empty]
+        moves = []
+        while empty:
+            low = empty & -empty #here is isolated the lowest empty square
+            moves.append(low.bit_length() - 1)
+            empty ^= low
+        return moves
+
+    def check_winner(self, letter):
+        #this method checks if the letter has completed any of the winning lines
+        mask = self.x_mask if letter == 'X' else self.o_mask
+        if self.geometry is CLASSIC:
+            return WINNING[mask] #the classic board has a precomputed answer for every mask
+        for line in self.geometry.lines:
+            if mask & line == line:
+                return True
+        return False
+
+    def empty_squares(self):
+        #this method checks if there are any empty squares left on the board
+        return (self.x_mask | self.o_mask) != self.geometry.full_mask
+
+    def num_empty_squares(self):
+        #this method returns the number of empty squares remaining on the board
+        return self.geometry.cells - (self.x_mask | self.o_mask).bit_count()
+
+    def canonical(self):
+        #this method returns the smallest of the 8 symmetric versions of the board (both masks packed in one integer)
+        #together with the index of the symmetry that produced it
+        #only the 3x3 board has the tables needed for this, since it is the only size whose positions are cached
+        tables = self.geometry.symmetry_tables
+        if tables is None:
+            raise ValueError("only 3x3 boards have a canonical form")
+        return min((table[self.x_mask] | table[self.o_mask] << 9, index) for index, table in enumerate(tables))
+
+    def copy(self):
+        #this method returns an independent copy of the board
+        other = Board.__new__(Board)
+        other.geometry = self.geometry
+        other.size = self.size
+        other.win_length = self.win_length
+        other.x_mask = self.x_mask
+        other.o_mask = self.o_mask
+        other.current_winner = self.current_winner
+        return other
+
+    def reset(self):
+        #this method clears the board to start a new game
+        self.x_mask = 0
+        self.o_mask = 0
+        self.current_winner = None
+
+    def __str__(self):
+        #this method returns the board as text rows, which is useful when playing without the GUI
+        cells = self.board
+        return '\n'.join('|'.join(cells[row * self.size:(row + 1) * self.size]) for row in range(self.size))
@@ -0,0 +1,184 @@
+#this module builds and reads the opening book, a table with the perfect move for every legal Tic Tac Toe position
+#the table is built once by solving every position, written to disk, and then loaded lazily by the smart player
+#usage: python book.py build | verify | stats
+import mmap #here is imported mmap to map the table file into memory without reading it up front
+import os #here is imported os to locate the table file next to this module
+import struct #here is imported struct to pack the file header
+import sys #here is imported sys to read the command line arguments
+import time #here is imported time to measure how long building and loading take
+from board import Board, SQUARES, WINNING, FULL_MASK #here are imported the headless board and its lookup tables
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tictactoe.book') #default location of the table
+MAGIC = b'TTTB' #here are the bytes every table file starts with
+VERSION = 1 #here is the version of the file layout, bumped whenever the layout changes
+HEADER = struct.Struct('<4sHH') #magic, version and number of positions per side to move
+POSITIONS = 3 ** 9 #every square is empty, 'X' or 'O', so a board is a 9-digit number in base 3
+NO_MOVE = 255 #here is the move stored for positions that are illegal or already finished
+
+#here is precomputed, for each of the 512 masks, the base-3 number with a digit 1 on every square of the mask
+#the index of a board is then TERNARY[x_mask] + 2 * TERNARY[o_mask]
+TERNARY = tuple(sum(3 ** i for i in range(9) if mask >> i & 1) for mask in range(512))
+#these are the squares in the order they are preferred when several moves are equally good: center, corners, edges
+SQUARE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+def entry_offset(x_mask, o_mask, letter):
+    #this function returns where the entry of a position is stored in the file
+    #each entry takes 2 bytes (the move and the score), X-to-move and O-to-move entries are interleaved
+    return HEADER.size + 2 * (2 * (TERNARY[x_mask] + 2 * TERNARY[o_mask]) + (letter == 'O'))
+
+def solve(x_mask, o_mask, letter, solved):
+    #this function returns the best move and its score for the player to move, using the same depth-weighted scores as minimax
+    #a win scores the number of empty squares left after the winning move plus one, a tie scores 0
+    key = (x_mask, o_mask, letter)
+    if key in solved:
+        return solved[key]
+    taken = x_mask | o_mask
+    empty = SQUARES[FULL_MASK & ~taken]
+    best_move, best_score = NO_MOVE, -100
+    for move in sorted(empty, key=SQUARE_ORDER.index):
+        bit = 1 << move
+        if letter == 'X':
+            next_x, next_o = x_mask | bit, o_mask
+            won = WINNING[next_x]
+        else:
+            next_x, next_o = x_mask, o_mask | bit
+            won = WINNING[next_o]
+        if won:
+            score = len(empty) #the squares left after this move are len(empty) - 1, plus one
+        elif len(empty) == 1:
+            score = 0 #the board is full, so the game is a tie
+        else:
+            #the score of the opponent's best reply is seen from the opponent, so it's negated
+            score = -solve(next_x, next_o, 'O' if letter == 'X' else 'X', solved)[1]
+        if score > best_score:
+            best_move, best_score = move, score
+    solved[key] = (best_move, best_score)
+    return best_move, best_score
+
+def legal_positions():
+    #this generator yields every position where a game can still be going on, with the player to move
+    #either letter may start, so 'X' is to move when the counts are equal or when 'O' has one more square, and vice versa
+    for x_mask in range(512):
+        for o_mask in range(512):
+            if x_mask & o_mask or WINNING[x_mask] or WINNING[o_mask] or (x_mask | o_mask) == FULL_MASK:
+                continue
+            difference = x_mask.bit_count() - o_mask.bit_count()
+            if difference in (0, -1):
+                yield x_mask, o_mask, 'X'
+            if difference in (0, 1):
+                yield x_mask, o_mask, 'O'
+
+def build(path=BOOK_PATH):
+    #this function solves every legal position and writes the table to disk, returning the number of positions solved
+    table = bytearray([NO_MOVE, 0]) * (2 * POSITIONS)
+    solved = {}
+    count = 0
+    for x_mask, o_mask, letter in legal_positions():
+        move, score = solve(x_mask, o_mask, letter, solved)
+        offset = entry_offset(x_mask, o_mask, letter) - HEADER.size
+        table[offset] = move
+        table[offset + 1] = score & 0xFF #the score is stored as a signed byte
+        count += 1
+    #here the table is written to a temporary file first, so a reader never sees a half-written table
+    with open(path + '.tmp', 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, POSITIONS))
+        f.write(table)
+    os.replace(path + '.tmp', path)
+    return count
+
+#this class gives access to a table built by build(), which is only opened the first time it's needed
+class OpeningBook:
+    def __init__(self, path=BOOK_PATH):
+        self.path = path #here is stored the location of the table file
+        self.data = None #here is stored the memory-mapped table, once it has been loaded
+        self.loaded = False #here is stored whether loading has already been attempted
+        self.load_time = None #here is stored how long loading took, in seconds
+
+    def load(self):
+        #this method maps the table into memory and returns True if it's available
+        #if the file is missing or was written by another version, the book stays empty and the players search instead
+        #once the table is mapped, later calls just report it as available instead of mapping it again
+        if self.data is not None:
+            return True
+        self.loaded = True
+        start = time.perf_counter()
+        try:
+            with open(self.path, 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return False
+        if len(data) != HEADER.size + 4 * POSITIONS or HEADER.unpack_from(data) != (MAGIC, VERSION, POSITIONS):
+            data.close()
+            return False
+        self.data = data
+        self.load_time = time.perf_counter() - start
+        return True
+
+    def lookup(self, state, letter):
+        #this method returns the best move and its score for the letter to move, or None if the position isn't in the table
+        if not self.loaded:
+            self.load()
+        if self.data is None:
+            return None
+        offset = entry_offset(state.x_mask, state.o_mask, letter)
+        move = self.data[offset]
+        if move == NO_MOVE:
+            return None
+        score = self.data[offset + 1]
+        return move, score - 256 if score > 127 else score
+
+    def file_size(self):
+        #this method returns the size of the table file in bytes, or None if it doesn't exist
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return None
+
+#this book is shared by all the smart players, so the table is loaded at most once per process
+shared_book = OpeningBook()
+
+def verify(book):
+    #this function checks every entry of the table against a live alpha-beta search and returns the number of mismatches
+    from player import SmartComputerPlayer #imported here because player.py itself imports this module
+    mismatches = 0
+    for x_mask, o_mask, letter in legal_positions():
+        state = Board()
+        state.x_mask, state.o_mask = x_mask, o_mask
+        entry = book.lookup(state, letter)
+        searcher = SmartComputerPlayer(letter, table=None, book=None, search='alphabeta')
+        expected = searcher.alphabeta(state, letter)['score']
+        if entry is None:
+            mismatches += 1
+            continue
+        move, score = entry
+        #here is checked that the stored move really reaches the stored score
+        state.make_move(move, letter)
+        reached = searcher.terminal_score(state, 'O' if letter == 'X' else 'X')
+        if reached is None:
+            reached = searcher.alphabeta(state, 'O' if letter == 'X' else 'X')
+        if score != expected or reached['score'] != expected:
+            mismatches += 1
+    return mismatches
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    if command == 'build':
+        start = time.perf_counter()
+        count = build()
+        print(f"solved {count} positions in {time.perf_counter() - start:.2f} s, wrote {os.path.getsize(BOOK_PATH)} bytes to {BOOK_PATH}")
+    elif command == 'verify':
+        start = time.perf_counter()
+        mismatches = verify(shared_book)
+        print(f"verified the table in {time.perf_counter() - start:.2f} s: {mismatches} mismatches")
+        sys.exit(1 if mismatches else 0)
+    elif command == 'stats':
+        if not shared_book.load():
+            print(f"no valid table at {BOOK_PATH}, run 'python book.py build' first")
+            sys.exit(1)
+        start = time.perf_counter()
+        shared_book.lookup(Board(), 'X')
+        print(f"file size: {shared_book.file_size()} bytes")
+        print(f"load time: {shared_book.load_time * 1000:.3f} ms, first lookup: {(time.perf_counter() - start) * 1e6:.1f} us")
+    else:
+        print("usage: python book.py build | verify | stats")
+        sys.exit(2)
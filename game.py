@@ -1,27 +1,46 @@
 import tkinter as tk #here the Tkinter library is imported to create the graphical user interface (GUI)
 from tkinter import messagebox, simpledialog #here specific modules from Tkinter are imported for message and input dialogs
 import random #here the random module is imported to allow for random choice selections
+import sys #here the sys module is imported to read the board size from the command line
+import threading #here the threading module is imported to be able to stop a search that is running in the background
+import time #here the time module is imported to measure how long the AI has been thinking
+from concurrent.futures import ThreadPoolExecutor #here the thread pool that runs the AI searches off the Tk main thread is imported
 from player import SmartComputerPlayer, RandomComputerPlayer #here the AI player classes are imported from player.py
+from board import Board #here the headless game state is imported from board.py
+from records import GameLog, GameRecord, player_kind #here the game log is imported, to keep every finished game
+
+POLL_INTERVAL = 50 #here is set how often, in milliseconds, the window checks if the AI has found its move
+SEARCH_TIMEOUT = 5.0 #here is set after how many seconds the AI is told to stop thinking and play its best move so far
 
 #this class defines the main Tic Tac Toe game with a graphical interface
 class TicTacToeGUI:
-    def __init__(self, root):
+    def __init__(self, root, size=3, win_length=None):
         #here the main window title is set, and the background color is configured
         self.root = root
         self.root.title("Advanced Tic Tac Toe")
         self.root.configure(bg="#333") #sets a dark background color
 
-        #here a 3x3 grid of buttons is created to represent the Tic Tac Toe board; initially, all buttons are set to None
-        self.buttons = [[None for _ in range(3)] for _ in range(3)]
+        #here the game state is created; the window only displays it and forwards the moves to it
+        self.state = Board(size, win_length)
+        self.size = self.state.size #here the number of rows and columns of the board is stored (3 for the classic game)
+        #here a grid of buttons is created to represent the Tic Tac Toe board; initially, all buttons are set to None
+        self.buttons = [[None for _ in range(self.size)] for _ in range(self.size)]
         self.human_player = None #here the variable for the human player's letter ('X' or 'O') is initialized as None
         self.ai_player = None #here the variable for the AI player's letter ('X' or 'O') is initialized as None
         self.current_player = None #here the variable that tracks whose turn it is is initialized as None
         self.ai_strategy = None #here the variable for the AI strategy (smart or random) is initialized as None
-        self.board = [' ' for _ in range(9)] #here a list representing the game board is created, initially empty spaces
-        self.current_winner = None #here the variable to track the current winner is initialized as None
         self.human_score = 0 #here the score counter for the human player is initialized to 0
         self.ai_score = 0 #here the score counter for the AI player is initialized to 0
         self.ties = 0 #here the counter for the number of ties in the game is initialized to 0
+        self.moves = [] #here the squares played in the current game are stored in order
+        self.first_player = None #here the letter that made the first move of the current game is stored
+        self.game_log = GameLog() #here the log that every finished game is appended to is created
+        #here a single background thread is created to run the AI searches, so the window keeps responding while the AI thinks
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending_search = None #here the search that is running in the background is stored, if there is one
+        self.stop_event = None #here the event that tells the running search to stop is stored
+        self.search_started = None #here the time the running search was started is stored
+        self.root.protocol("WM_DELETE_WINDOW", self.exit_game) #closing the window stops the AI before exiting
 
         #this method is called to ask the player to choose their letter and select the AI strategy
         self.choose_letter_and_strategy()
@@ -64,6 +83,7 @@ class TicTacToeGUI:
 
         # here a random selection is made to determine who goes first, the human player or the AI
         self.current_player = random.choice([self.human_player, self.ai_player])
+        self.first_player = self.current_player #remember who started, for the game log
         self.create_widgets() #this method sets up the game board UI elements (buttons and labels)
         self.create_menu() #this method sets up the game menu with options like starting a new game or exiting
 
@@ -77,11 +97,11 @@ class TicTacToeGUI:
     def create_widgets(self):
         #this method creates and configures the main label that displays whose turn it is
         self.info_label = tk.Label(self.root, text=f"{self.current_player}'s Turn!", font="Arial 16 bold", bg="#333", fg="white")
-        self.info_label.grid(row=0, column=0, columnspan=3) #position the label at the top, spanning across three columns
+        self.info_label.grid(row=0, column=0, columnspan=self.size) #position the label at the top, spanning across all the columns
 
-        #this loop creates a 3x3 grid of buttons that represent the Tic Tac Toe board, which players will click to make moves
-        for i in range(3):
-            for j in range(3):
+        #this loop creates the grid of buttons that represent the Tic Tac Toe board, which players will click to make moves
+        for i in range(self.size):
+            for j in range(self.size):
                 #create each button with a default empty text, configure the style, and assign the click event handler
                 self.buttons[i][j] = tk.Button(self.root, text=" ", font="Arial 24 bold", width=5, height=2,
                                                bg="#eee", fg="#333",
@@ -91,7 +111,7 @@ class TicTacToeGUI:
         #this label is created to display the scores (human player, AI, and ties) and is positioned below the board
         self.score_label = tk.Label(self.root, text=f"Score - You: {self.human_score} AI: {self.ai_score} Ties: {self.ties}", 
                                     font="Arial 12", bg="#333", fg="white")
-        self.score_label.grid(row=4, column=0, columnspan=3) #position the score label below the grid, spanning three columns
+        self.score_label.grid(row=self.size + 1, column=0, columnspan=self.size) #position the score label below the grid, spanning all the columns
 
     def create_menu(self):
         #this method creates the menu bar that appears at the top of the window with options for the game
@@ -103,19 +123,21 @@ class TicTacToeGUI:
         menubar.add_cascade(label="Game", menu=game_menu)
         game_menu.add_command(label="New Game", command=self.reset_board) #add an option to start a new game
         game_menu.add_separator() #add a separator line in the menu
-        game_menu.add_command(label="Exit", command=self.root.quit) #add an option to exit the game
+        game_menu.add_command(label="Exit", command=self.exit_game) #add an option to exit the game
 
     def button_click(self, row, col):
         #this method is called when a player clicks a button (makes a move)
-        if self.buttons[row][col]["text"] == " " and self.current_winner is None: #check if the button is empty and the game is not yet won
-            self.make_move(row * 3 + col, self.human_player) #update the board with the human player's move
+        #check if the button is empty, the game is not yet won and it's the human player's turn (not while the AI is thinking)
+        if self.buttons[row][col]["text"] == " " and self.state.current_winner is None and self.current_player == self.human_player:
+            self.state.make_move(row * self.size + col, self.human_player) #update the board with the human player's move
+            self.moves.append(row * self.size + col) #record the move for the game log
             self.buttons[row][col]["text"] = self.human_player #update the button's text to show the player's move
             self.buttons[row][col]["bg"] = "#4CAF50" #change the button's background color to indicate it's taken
 
-            if self.check_winner(self.human_player): #check if the human player has won the game
+            if self.state.check_winner(self.human_player): #check if the human player has won the game
                 self.human_score += 1 #increment the human player's score
                 self.end_game(f"You win!") #call the method to handle the end of the game with a winning message
-            elif not self.empty_squares(): #check if the board is full, indicating a tie
+            elif not self.state.empty_squares(): #check if the board is full, indicating a tie
                 self.ties += 1 #increment the tie count
                 self.end_game("It's a tie!") #call the method to handle the end of the game with a tie message
             else:
@@ -125,20 +147,61 @@ class TicTacToeGUI:
                 self.root.after(500, self.ai_move) #trigger the AI's move after a short delay of 500 milliseconds
 
     def ai_move(self):
-        #this method handles the AI's move
-        if self.current_winner is None and self.current_player == self.ai_player: #ensure the game is not yet won and it's the AI's turn
-            move = self.ai_strategy.get_move(self) #get the AI's move using the selected strategy (smart or random)
-        
-            if self.make_move(move, self.ai_player): #update the board with the AI's move
-                row, col = divmod(move, 3) #convert the move index to row and column
+        #this method starts the AI's move in the background thread
+        #ensure the game is not yet won, it's the AI's turn and the AI isn't already thinking
+        if self.state.current_winner is None and self.current_player == self.ai_player and self.pending_search is None:
+            #here the AI gets its own event to be stopped with, and a copy of the board, so the search never touches the board on screen
+            self.stop_event = threading.Event()
+            self.ai_strategy.stop_event = self.stop_event
+            self.search_started = time.perf_counter()
+            self.pending_search = self.executor.submit(self.ai_strategy.get_move, self.state.copy())
+            self.root.after(POLL_INTERVAL, self.poll_ai_move, self.pending_search) #check back shortly for the result
+
+    def poll_ai_move(self, search):
+        #this method is called by the Tk loop to check if the background search has found the AI's move
+        if search is not self.pending_search:
+            return #the search was cancelled (new game or exit), so its result is ignored
+        if not search.done():
+            #if the AI has been thinking for too long, it's told to stop and play the best move it has found so far
+            if time.perf_counter() - self.search_started > SEARCH_TIMEOUT:
+                self.stop_event.set()
+            self.root.after(POLL_INTERVAL, self.poll_ai_move, search) #check back again shortly
+            return
+        self.pending_search = None
+        try:
+            move = search.result()
+        except Exception:
+            #if the search failed, a random empty square is played instead, so the game doesn't get stuck on the AI's turn
+            move = random.choice(self.state.available_moves())
+        self.play_ai_move(move) #the move is played here, on the Tk main thread
+
+    def cancel_ai_move(self):
+        #this method stops the background search, if there is one, and makes sure its result is never played
+        if self.pending_search is not None:
+            self.stop_event.set() #tell a running search to stop as soon as possible
+            self.pending_search.cancel() #drop a search that hasn't started yet
+            self.pending_search = None
+
+    def exit_game(self):
+        #this method stops the AI and closes the game
+        self.cancel_ai_move()
+        self.executor.shutdown(wait=False, cancel_futures=True) #don't wait for the background thread, it stops by itself
+        self.root.quit()
+
+    def play_ai_move(self, move):
+        #this method places the AI's move on the board once the background search has found it
+        if self.state.current_winner is None and self.current_player == self.ai_player: #ensure the game is not yet won and it's the AI's turn
+            if self.state.make_move(move, self.ai_player): #update the board with the AI's move
+                self.moves.append(move) #record the move for the game log
+                row, col = divmod(move, self.size) #convert the move index to row and column
                 self.buttons[row][col]["text"] = self.ai_player #update the button's text to show the AI's move
                 self.buttons[row][col]["bg"] = "#F44336" #change the button's background color to indicate it's taken by AI
                 self.buttons[row][col].config(state="disabled") #disable the button to prevent further clicks
 
-                if self.check_winner(self.ai_player): #check if the AI has won the game
+                if self.state.check_winner(self.ai_player): #check if the AI has won the game
                     self.ai_score += 1 #increment the AI's score
                     self.end_game(f"AI wins!") #call the method to handle the end of the game with a winning message
-                elif not self.empty_squares(): #check if the board is full, indicating a tie
+                elif not self.state.empty_squares(): #check if the board is full, indicating a tie
                     self.ties += 1 #increment the tie count
                     self.end_game("It's a tie!") #call the method to handle the end of the game with a tie message
                 else:
@@ -146,55 +209,13 @@ class TicTacToeGUI:
                     self.current_player = self.human_player
                     self.info_label.config(text="Your Turn!") #update the label to inform the player it's their turn
 
-    def make_move(self, square, letter):
-        #this method updates the board with the player's or AI's move
-        if self.board[square] == ' ':
-            self.board[square] = letter #place the player's letter ('X' or 'O') on the board at the specified square
-            if self.check_winner(letter): #check if this move results in a win
-                self.current_winner = letter #set the current winner to the player who made the move
-            return True #return True indicating the move was successful
-        return False #return False if the move was invalid (e.g., the square was already taken)
-
-    def available_moves(self):
-        #this method returns a list of available moves (empty squares) on the board
-        return [i for i, spot in enumerate(self.board) if spot == ' ']  # return the indices of empty spots
-
-    def check_winner(self, letter):
-        #this method checks all possible winning combinations on the board
-        #check all rows to see if any of them have the same letter (i.e., all 'X' or all 'O')
-        for row in [self.board[i*3:(i+1)*3] for i in range(3)]:
-            if all([s == letter for s in row]):
-                return True
-        #check all columns to see if any of them have the same letter
-        for col in [[self.board[i+j*3] for j in range(3)] for i in range(3)]:
-            if all([s == letter for s in col]):
-                return True
-            
-        #check the main diagonal (positions 0, 4, 8) to see if all three positions have the same letter
-        check_main_diagonal = all([self.board[i] == letter for i in [0, 4, 8]])
-        #check the anti-diagonal (positions 2, 4, 6) to see if all three positions have the same letter
-        check_anti_diagonal = all([self.board[i] == letter for i in [2, 4, 6]])
-        #if either diagonal check is True, return True indicating a win on a diagonal
-        if check_main_diagonal or check_anti_diagonal:
-            return True
-        #return False if there is no winner on any diagonal
-        return False
-
-
-    def empty_squares(self):
-        #this method checks if there are any empty squares left on the board
-        return ' ' in self.board #return True if there is at least one empty square, otherwise False
-
-    def num_empty_squares(self):
-        #this method returns the number of empty squares remaining on the board
-        return self.board.count(' ') #count and return the number of empty spaces
-
     def reset_board(self):
         #this method resets the board to start a new game
-        self.board = [' ' for _ in range(9)] #clear the board by resetting all squares to empty
-        self.current_winner = None #reset the current winner to None
-        for i in range(3):
-            for j in range(3):
+        self.cancel_ai_move() #stop the AI if it's still thinking about the previous game
+        self.state.reset() #clear the board and the current winner
+        self.moves = [] #clear the moves recorded for the game log
+        for i in range(self.size):
+            for j in range(self.size):
                 self.buttons[i][j]["text"] = " " #clear the text on each button
                 self.buttons[i][j]["bg"] = "#eee" #reset the button background color to the default
                 self.buttons[i][j].config(state="normal") #enable all buttons for the new game
@@ -213,11 +234,32 @@ class TicTacToeGUI:
         for row in self.buttons:
             for button in row:
                 button.config(state="disabled")
+        self.record_game() #append the finished game to the game log
         #reset the board after a delay of 2 seconds to allow the player to see the result
         self.root.after(2000, self.reset_board)
 
+    def record_game(self):
+        #this method appends the moves of the finished game to the game log, with the kind of each player
+        if self.size > 4:
+            return #boards larger than 4x4 can't be recorded, since every move is stored in a single nibble
+        x_player = None if self.human_player == 'X' else self.ai_strategy #None stands for the human player
+        o_player = None if self.human_player == 'O' else self.ai_strategy
+        record = GameRecord(player_kind(x_player), player_kind(o_player), self.size, self.state.win_length,
+                            self.first_player, self.moves)
+        try:
+            self.game_log.append(record)
+        except OSError:
+            pass #a log that can't be written must not stop the game
+
 #this is the main code to start the game
 if __name__ == '__main__':
+    #the board size and the win length can be given on the command line, for example 'python game.py 5 4' for 4 in a row on 5x5
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    win_length = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    try:
+        Board(size, win_length) #check the size before opening the window
+    except ValueError as error:
+        sys.exit(str(error))
     root = tk.Tk() #here the main window is created using Tkinter
-    game = TicTacToeGUI(root) #here an instance of the TicTacToeGUI class is created, passing the main window
+    game = TicTacToeGUI(root, size, win_length) #here an instance of the TicTacToeGUI class is created, passing the main window and the board size
     root.mainloop() #here the Tkinter event loop is started, which keeps the window open and responsive
@@ -0,0 +1,134 @@
+#this module records what every move of a player costs: time, positions searched, search depth, cache use and score
+#it's opt-in: attach() wraps the methods of one player object, so players that aren't attached run exactly as before
+#usage example: python instrument.py --x smart --o random --games 50 --jsonl moves.jsonl
+import argparse #here is imported argparse to read the command line options
+import json #here is imported json to write the records as JSON lines
+import random #here is imported random to fix the seed of the profiled games
+import statistics #here is imported statistics to summarize the records
+import sys #here is imported sys to write the summary to the standard output
+import time #here is imported time to measure how long each move takes
+
+#these are the search methods wrapped to measure the search depth; each one calls itself (or the next one) once per level
+SEARCH_METHODS = ('minimax', 'alphabeta', 'search_root', 'negamax')
+
+#this class records one entry per get_move call of every player attached to it
+class SearchProfiler:
+    def __init__(self, sink=None):
+        self.sink = sink #here is stored an open text file the records are written to as JSON lines (None keeps them in memory only)
+        self.records = [] #here are stored the records of all the moves
+        self.depth = 0 #here is stored how many search calls are currently nested
+        self.max_depth = 0 #here is stored the deepest nesting reached during the current move
+
+    def attach(self, player):
+        #this method starts recording the moves of the player and returns it
+        #the wrappers are stored on the player object itself, so other players of the same class aren't affected
+        get_move = player.get_move
+        def recorded_get_move(game):
+            return self.record(player, get_move, game)
+        player.get_move = recorded_get_move
+        for name in SEARCH_METHODS:
+            if hasattr(player, name):
+                setattr(player, name, self.wrap_search(getattr(player, name)))
+        return player
+
+    def detach(self, player):
+        #this method stops recording the player, removing all the wrappers
+        for name in ('get_move',) + SEARCH_METHODS:
+            player.__dict__.pop(name, None)
+
+    def wrap_search(self, method):
+        #this method returns a version of a search method that keeps track of how deep the recursion goes
+        def tracked(*args, **kwargs):
+            self.depth += 1
+            if self.depth > self.max_depth:
+                self.max_depth = self.depth
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.depth -= 1
+        return tracked
+
+    def record(self, player, get_move, game):
+        #this method runs one get_move call and records what it cost
+        table = getattr(player, 'table', None)
+        hits = table.hits if table is not None else 0
+        misses = table.misses if table is not None else 0
+        self.depth = 0
+        self.max_depth = 0
+        empty = game.num_empty_squares()
+        start = time.perf_counter()
+        move = get_move(game)
+        elapsed = time.perf_counter() - start
+        record = {
+            'player': type(player).__name__,
+            'letter': player.letter,
+            'empty_squares': empty,
+            'move': move,
+            'seconds': elapsed,
+            'nodes': getattr(player, 'nodes_visited', 0),
+            #the levels below the root of the search, counting a deeper iteration that was stopped by the time budget
+            'max_depth': max(self.max_depth - 1, 0),
+            #the depth of the last iteration that was completed, which is the one the move comes from
+            #(None when the move didn't come from a depth-limited search)
+            'completed_depth': getattr(player, 'depth_reached', 0) or None,
+            'cache_hits': table.hits - hits if table is not None else 0,
+            'cache_misses': table.misses - misses if table is not None else 0,
+            'score': getattr(player, 'last_score', None),
+        }
+        self.records.append(record)
+        if self.sink is not None:
+            self.sink.write(json.dumps(record) + '\n')
+        return move
+
+    def summary(self):
+        #this method returns the records aggregated per player class and letter
+        groups = {}
+        for record in self.records:
+            groups.setdefault(f"{record['player']}:{record['letter']}", []).append(record)
+        result = {}
+        for name, records in groups.items():
+            times = sorted(record['seconds'] for record in records)
+            nodes = [record['nodes'] for record in records]
+            hits = sum(record['cache_hits'] for record in records)
+            lookups = hits + sum(record['cache_misses'] for record in records)
+            result[name] = {
+                'moves': len(records),
+                'total_seconds': sum(times),
+                'median_us': statistics.median(times) * 1e6,
+                'max_us': times[-1] * 1e6,
+                'mean_nodes': statistics.mean(nodes),
+                'max_nodes': max(nodes),
+                'max_depth': max(record['max_depth'] for record in records),
+                'max_completed_depth': max((record['completed_depth'] for record in records if record['completed_depth']), default=None),
+                'cache_hit_rate': hits / lookups if lookups else None,
+            }
+        return result
+
+def main():
+    from simulate import find_player, play_game
+    parser = argparse.ArgumentParser(description="Play games with profiling enabled and report what the moves cost.")
+    parser.add_argument('--x', default='smart', help="player class for 'X'")
+    parser.add_argument('--o', default='random', help="player class for 'O'")
+    parser.add_argument('--games', type=int, default=20, help="number of games to play")
+    parser.add_argument('--seed', type=int, default=0, help="seed that fixes the random choices")
+    parser.add_argument('--size', type=int, default=3, help="number of rows and columns of the board")
+    parser.add_argument('--win-length', type=int, default=None, help="letters in a row needed to win (default: the board size)")
+    parser.add_argument('--jsonl', help="file to write one JSON record per move to")
+    args = parser.parse_args()
+
+    sink = open(args.jsonl, 'w') if args.jsonl else None
+    try:
+        profiler = SearchProfiler(sink)
+        x_player = profiler.attach(find_player(args.x)('X'))
+        o_player = profiler.attach(find_player(args.o)('O'))
+        random.seed(args.seed)
+        for index in range(args.games):
+            play_game(x_player, o_player, 'X' if index % 2 == 0 else 'O', args.size, args.win_length)
+    finally:
+        if sink is not None:
+            sink.close()
+    json.dump(profiler.summary(), sys.stdout, indent=2)
+    print()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#this module opens many connections to server.py at once, plays random moves on all of them and measures the replies
+#usage example: python loadgen.py --clients 1000 --games 5 --strategy smart
+import argparse #here is imported argparse to read the command line options
+import asyncio #here is imported asyncio to drive all the connections from a single thread
+import json #here is imported json to read the server statistics
+import random #here is imported random to pick the client's moves
+import time #here is imported time to measure the round trips
+
+async def play_client(host, port, games, strategy, size, win_length, rng, latencies):
+    #this function plays a number of games over one connection, recording the round trip of every move
+    reader, writer = await asyncio.open_connection(host, port)
+    async def request(line):
+        writer.write(line.encode('ascii') + b'\n')
+        await writer.drain()
+        return (await reader.readline()).decode('ascii').split()
+    try:
+        for game in range(games):
+            letter = 'X' if game % 2 == 0 else 'O'
+            command = f"NEW {strategy} {letter}" + (f" {size}" if size else '') + (f" {win_length}" if win_length else '')
+            reply = await request(command)
+            if reply[0] != 'OK':
+                raise RuntimeError(' '.join(reply))
+            empty = set(range(int(reply[2]) ** 2)) #here the client keeps track of the empty squares itself
+            if 'AI' in reply:
+                empty.discard(int(reply[reply.index('AI') + 1]))
+            while True:
+                move = rng.choice(sorted(empty))
+                empty.discard(move)
+                start = time.perf_counter()
+                reply = await request(f"MOVE {move}")
+                latencies.append(time.perf_counter() - start)
+                if reply[0] == 'ERR':
+                    raise RuntimeError(' '.join(reply))
+                if reply[0] == 'AI':
+                    empty.discard(int(reply[1]))
+                if 'END' in reply:
+                    break
+        writer.write(b'QUIT\n') #the server closes the connection without a reply
+        await writer.drain()
+    finally:
+        writer.close()
+
+async def run(args):
+    latencies = []
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        play_client(args.host, args.port, args.games, args.strategy, args.size, args.win_length,
+                    random.Random(rng.random()), latencies)
+        for _ in range(args.clients)
+    ))
+    elapsed = time.perf_counter() - start
+    #here the server's own view of the load is asked for on a separate connection
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    writer.write(b'STATS\n')
+    await writer.drain()
+    stats = json.loads((await reader.readline()).decode('ascii').split(' ', 1)[1])
+    writer.close()
+
+    latencies.sort()
+    def percentile(fraction):
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1e3 if latencies else 0.0
+    print(f"{args.clients} clients x {args.games} games: {len(latencies)} moves in {elapsed:.2f} s "
+          f"({len(latencies) / elapsed:.0f} moves/s)")
+    print(f"round trip: p50 {percentile(0.5):.2f} ms, p90 {percentile(0.9):.2f} ms, p99 {percentile(0.99):.2f} ms")
+    print(f"server: {json.dumps(stats)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate load on server.py and measure it.")
+    parser.add_argument('--host', default='127.0.0.1', help="address of the server")
+    parser.add_argument('--port', type=int, default=8765, help="port of the server")
+    parser.add_argument('--clients', type=int, default=100, help="number of concurrent connections")
+    parser.add_argument('--games', type=int, default=10, help="games played by each connection")
+    parser.add_argument('--strategy', choices=['smart', 'random'], default='smart', help="AI the clients play against")
+    parser.add_argument('--size', type=int, default=None, help="number of rows and columns of the board")
+    parser.add_argument('--win-length', type=int, default=None, help="letters in a row needed to win")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the clients' random moves")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == '__main__':
+    main()
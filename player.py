@@ -1,10 +1,75 @@
 import random #here is imported the random module to allow the AI to make random choices
+import time #here is imported the time module to keep the search on larger boards within its time budget
+from collections import OrderedDict #here is imported OrderedDict to keep the cache entries in eviction order
+from book import shared_book #here is imported the table of solved positions, which is loaded the first time it's used
+
+#this class defines a bounded cache of already solved positions (a transposition table)
+#positions are stored under their canonical form, so one entry serves all 8 symmetric versions of a position
+class TranspositionTable:
+    def __init__(self, max_size=100000, eviction='lru'):
+        #here is checked that the eviction policy is one of the supported ones
+        if eviction not in ('lru', 'fifo'):
+            raise ValueError("eviction must be either 'lru' or 'fifo'")
+        self.max_size = max_size #here is stored the maximum number of entries (None means the table is unbounded)
+        self.eviction = eviction #'lru' drops the least recently used entry, 'fifo' drops the oldest stored entry
+        self.entries = OrderedDict() #here are stored the entries, the first one is always the next to be evicted
+        self.hits = 0 #here is counted how many lookups found a stored entry
+        self.misses = 0 #here is counted how many lookups found nothing
+
+    def __len__(self):
+        #this method returns the number of positions currently stored
+        return len(self.entries)
+
+    @property
+    def size(self):
+        #this property returns the number of positions currently stored
+        return len(self.entries)
+
+    def key(self, state, player):
+        #this method builds the lookup key of a position and the symmetry that maps it to its canonical form
+        canonical, symmetry = state.canonical()
+        return (canonical, player, state.geometry), symmetry #the geometry keeps boards of different sizes apart
+
+    def get(self, key):
+        #this method returns the stored entry for the key, or None if the position has not been solved yet
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.eviction == 'lru':
+            self.entries.move_to_end(key) #mark the entry as the most recently used one
+        return entry
+
+    def put(self, key, entry):
+        #this method stores an entry and evicts the oldest one if the table is full
+        self.entries[key] = entry
+        if self.eviction == 'lru':
+            self.entries.move_to_end(key)
+        if self.max_size is not None and len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        #this method removes all the entries and resets the counters
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        #this method returns the counters of the table, which are used to check how effective the cache is
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries),
+                'max_size': self.max_size, 'eviction': self.eviction}
+
+#this table is shared by all the smart players, so solved positions survive across turns and across games
+shared_table = TranspositionTable()
 
 #this class defines a general player in the game
 class Player:
     def __init__(self, letter):
         #here is initialized the player's letter, which can be either 'X' or 'O'
         self.letter = letter
+        #here is stored an optional threading.Event; when a front end sets it, a long search stops and plays its best move so far
+        self.stop_event = None
 
     def get_move(self, game):
         #this method is a placeholder to be implemented by subclasses.
@@ -23,40 +88,114 @@ class RandomComputerPlayer(Player):
         square = random.choice(game.available_moves()) #here is selected one random move
         return square #here is returned the chosen move
 
+#these are the squares in the order they are tried after winning and blocking moves: center first, then corners, then edges
+SQUARE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+#here is the score of a won game in the depth-limited search, far above anything the evaluation of open lines can reach
+WIN_SCORE = 10 ** 9
+
+#this exception stops the depth-limited search when its time budget runs out
+class SearchTimeout(Exception):
+    pass
+
 #this class defines a smart computer player that uses the minimax algorithm to make optimal moves
 class SmartComputerPlayer(Player):
-    def __init__(self, letter):
+    def __init__(self, letter, table=shared_table, search='minimax', book=shared_book, time_limit=1.0, max_depth=None):
         #here is called the constructor of the parent Player class to initialize the letter ('X' or 'O')
         super().__init__(letter)
+        #here is checked that the search algorithm is one of the supported ones
+        if search not in ('minimax', 'alphabeta'):
+            raise ValueError("search must be either 'minimax' or 'alphabeta'")
+        #here is stored the transposition table used to remember solved positions (None disables the cache)
+        self.table = table
+        self.search = search #'minimax' searches every branch, 'alphabeta' cuts off branches that cannot change the result
+        self.book = book #here is stored the table of solved positions, looked up before searching (None always searches)
+        self.time_limit = time_limit #here is stored how many seconds a move may take on boards larger than 3x3
+        self.max_depth = max_depth #here is stored how many moves ahead to look at most on those boards (None means no limit)
+        self.nodes_visited = 0 #here is counted how many positions the last search visited
+        self.last_score = None #here is stored the score of the last move chosen (None when it was picked at random)
+        self.depth_reached = 0 #here is stored the depth of the last search that was completed on those boards
 
     def get_move(self, game):
         #this method decides on the best move using the minimax algorithm, except for the first move
-        if len(game.available_moves()) == 9:
-            #if it's the first move of the game, choose a random square because all squares are equally good
-            square = random.choice(game.available_moves())
+        self.nodes_visited = 0 #reset the node counter for this search
+        self.last_score = None
+        self.depth_reached = 0 #only a depth-limited search sets this
+        if not game.classic:
+            #boards larger than 3x3 are too big to search to the end, so the search goes as deep as the time budget allows
+            best = self.iterative_deepening(game)
         else:
-            #otherwise, use the minimax algorithm to calculate the best possible move
-            square = self.minimax(game, self.letter)['position']
-        return square #here is returned the chosen move
+            #here is looked up the position in the table of solved positions, if there is one
+            entry = self.book.lookup(game, self.letter) if self.book is not None else None
+            if len(game.available_moves()) == game.num_squares:
+                #if it's the first move of the game, choose a random square because all squares are equally good
+                return random.choice(game.available_moves())
+            elif entry is not None:
+                #if the position was found in the table, its best move is read directly without any search
+                best = {'position': entry[0], 'score': entry[1]}
+            elif self.search == 'alphabeta':
+                #use alpha-beta pruning, which finds the same best score while visiting far fewer positions
+                best = self.alphabeta(game, self.letter)
+            else:
+                #otherwise, use the minimax algorithm to calculate the best possible move
+                best = self.minimax(game, self.letter)
+        self.last_score = best['score']
+        return best['position'] #here is returned the chosen move
 
-    def minimax(self, state, player):
-        #here is initialized the player that is trying to maximize the score, which is the smart computer itself
-        max_player = self.letter
-        #here is determined the opponent player, which is the player who isn't making the current move
+    def terminal_score(self, state, player):
+        #this method returns the result of a finished game, or None if the game is still going on
+        #here is determined the opponent player, which is the player who made the previous move
         other_player = 'O' if player == 'X' else 'X'
-
         #this block of code checks if the previous move resulted in a win for the opponent
         if state.current_winner == other_player:
             #if the opponent has won, calculate the score based on how many empty squares are left
             #the fewer squares left, the better the win for the opponent (or worse for the AI)
-            #the score is positive if the opponent wins and it's their turn; it's negative if it's the AI's turn
+            #the score is positive if the opponent is the AI itself; it's negative if the opponent is the human
             return {
                 'position': None, #no specific position is relevant since the game is over
-                'score': 1 * (state.num_empty_squares() + 1) if other_player == max_player else -1 * (state.num_empty_squares() + 1)
+                'score': 1 * (state.num_empty_squares() + 1) if other_player == self.letter else -1 * (state.num_empty_squares() + 1)
             }
         #this checks if the board is full and there is a tie
         elif not state.empty_squares():
             return {'position': None, 'score': 0} #a tie has a neutral score of 0
+        return None
+
+    def lookup(self, state, player):
+        #this method looks the position up in the transposition table and returns the stored result, if any
+        key, symmetry = self.table.key(state, player)
+        entry = self.table.get(key)
+        if entry is None:
+            return key, symmetry, None
+        position, score = entry
+        #the stored score is seen from the player to move, so it's flipped if that player is the opponent
+        return key, symmetry, {
+            'position': state.geometry.symmetries[symmetry][position], #map the canonical square back to this board
+            'score': score if player == self.letter else -score
+        }
+
+    def store(self, state, key, symmetry, player, best):
+        #this method stores a solved position in the transposition table, with the square mapped into the canonical board
+        self.table.put(key, (state.geometry.inverse_symmetries[symmetry][best['position']],
+                             best['score'] if player == self.letter else -best['score']))
+
+    def minimax(self, state, player):
+        #here is counted the position that is being visited
+        self.nodes_visited += 1
+        #here is initialized the player that is trying to maximize the score, which is the smart computer itself
+        max_player = self.letter
+        #here is determined the opponent player, which is the player who isn't making the current move
+        other_player = 'O' if player == 'X' else 'X'
+
+        #this block of code returns the score right away if the game is already over
+        result = self.terminal_score(state, player)
+        if result is not None:
+            return result
+
+        #this block of code looks the position up in the transposition table before searching it again
+        if self.table is not None:
+            key, symmetry, cached = self.lookup(state, player)
+            if cached is not None:
+                return cached
 
         #this block of code sets up variables to track the best possible move
         if player == max_player:
@@ -74,8 +213,7 @@ class SmartComputerPlayer(Player):
             sim_score = self.minimax(state, other_player)
 
             #after simulating, reset the board to its original state (undo the move)
-            state.board[possible_move] = ' '
-            state.current_winner = None #clear the winner, since the move was undone
+            state.undo_move(possible_move) #this also clears the winner, since the move was undone
             sim_score['position'] = possible_move #record the position that was just tried
 
             #this block of code updates the best score based on whether the current player is maximizing or minimizing
@@ -87,5 +225,178 @@ class SmartComputerPlayer(Player):
                 #if the current player is the opponent (minimizing player), choose the move with the lowest score
                 if sim_score['score'] < best['score']:
                     best = sim_score #update the best score to the lower score
+
+        #here is stored the result in the transposition table
+        if self.table is not None:
+            self.store(state, key, symmetry, player, best)
         #here is returned the best move found after considering all possibilities
         return best
+
+    def ordered_moves(self, state, player, moves=None):
+        #this method returns the moves (all the available ones by default) sorted so that the most promising ones are searched first
+        #trying good moves first makes the alpha-beta cutoffs happen much earlier
+        other_player = 'O' if player == 'X' else 'X'
+        candidates = set(state.available_moves() if moves is None else moves)
+        #here are found the moves that win the game right away for the current player
+        winning = [move for move in candidates if state.is_winning_move(move, player)]
+        #here are found the moves that take a square the opponent needs to win
+        blocking = [move for move in candidates if move not in winning and state.is_winning_move(move, other_player)]
+        #the remaining moves go from the center outwards (on the classic board: center, corners, edges)
+        order = SQUARE_ORDER if state.classic else state.geometry.center_order
+        rest = [move for move in order if move in candidates and move not in winning and move not in blocking]
+        return winning + blocking + rest
+
+    def alphabeta(self, state, player, alpha=-float('inf'), beta=float('inf')):
+        #this method is the minimax search with alpha-beta pruning
+        #alpha is the score the AI is already sure to get, beta is the score the opponent is already sure to get
+        #a branch is abandoned as soon as it cannot end up between the two, since neither player would let the game go there
+        self.nodes_visited += 1 #here is counted the position that is being visited
+        max_player = self.letter
+        other_player = 'O' if player == 'X' else 'X'
+
+        #this block of code returns the score right away if the game is already over
+        result = self.terminal_score(state, player)
+        if result is not None:
+            return result
+
+        #this block of code looks the position up in the transposition table; stored scores are always exact
+        if self.table is not None:
+            key, symmetry, cached = self.lookup(state, player)
+            if cached is not None:
+                return cached
+        alpha_start, beta_start = alpha, beta #here is remembered the window the search started with
+
+        if player == max_player:
+            best = {'position': None, 'score': -float('inf')}
+        else:
+            best = {'position': None, 'score': float('inf')}
+
+        #this loop iterates over the moves, most promising first, until a cutoff happens
+        for possible_move in self.ordered_moves(state, player):
+            state.make_move(possible_move, player)
+            sim_score = self.alphabeta(state, other_player, alpha, beta)
+            state.undo_move(possible_move)
+            sim_score['position'] = possible_move
+
+            if player == max_player:
+                if sim_score['score'] > best['score']:
+                    best = sim_score
+                alpha = max(alpha, best['score']) #the AI can now get at least this score
+            else:
+                if sim_score['score'] < best['score']:
+                    best = sim_score
+                beta = min(beta, best['score']) #the opponent can now hold the AI to at most this score
+            if alpha >= beta:
+                break #the other player would never allow this position, so the remaining moves are skipped
+
+        #here is stored the result only if it is the exact score, which is the case when it fell inside the starting window
+        if self.table is not None and alpha_start < best['score'] < beta_start:
+            self.store(state, key, symmetry, player, best)
+        return best
+
+    def iterative_deepening(self, state):
+        #this method searches 1 move ahead, then 2, then 3 and so on until the time budget runs out,
+        #and returns the best move of the deepest search that was completed
+        #each search starts with the best move of the previous one, which makes its alpha-beta cutoffs much better
+        self.deadline = time.perf_counter() + self.time_limit
+        self.depth_reached = 0
+        limit = state.num_empty_squares() if self.max_depth is None else min(self.max_depth, state.num_empty_squares())
+        moves = self.ordered_moves(state, self.letter, self.candidate_moves(state))
+        best = {'position': moves[0], 'score': 0} #if not even 1 move ahead can be searched, the best ordered move is used
+        for depth in range(1, limit + 1):
+            if self.stop_event is not None and self.stop_event.is_set():
+                break #the search was told to stop, so the best move found so far is played
+            try:
+                result = self.search_root(state, moves, depth)
+            except SearchTimeout:
+                break
+            best = result
+            self.depth_reached = depth
+            moves.remove(best['position'])
+            moves.insert(0, best['position'])
+            if abs(best['score']) >= WIN_SCORE:
+                break #the game is decided either way, so searching deeper can't change the move
+        return best
+
+    def search_root(self, state, moves, depth):
+        #this method searches every move of the current position depth moves ahead and returns the best one
+        other_player = 'O' if self.letter == 'X' else 'X'
+        best = {'position': None, 'score': -float('inf')}
+        alpha = -float('inf')
+        for move in moves:
+            state.make_move(move, self.letter)
+            try:
+                score = -self.negamax(state, other_player, depth - 1, -float('inf'), -alpha)
+            finally:
+                state.undo_move(move) #the board is restored even when the search is stopped
+            if score > best['score']:
+                best = {'position': move, 'score': score}
+                alpha = score
+        return best
+
+    def negamax(self, state, player, depth, alpha, beta):
+        #this method is the depth-limited alpha-beta search used on boards larger than 3x3
+        #it's written from the point of view of the player to move: the opponent's score is simply negated
+        self.nodes_visited += 1
+        #here is checked the time budget and whether the search was told to stop, every 1024 positions to keep the cost low
+        if self.nodes_visited & 1023 == 0 and (time.perf_counter() > self.deadline or
+                                               (self.stop_event is not None and self.stop_event.is_set())):
+            raise SearchTimeout()
+        if state.current_winner is not None:
+            #the previous move won the game, which is a loss for the player to move; losing later is less bad
+            return -(WIN_SCORE + state.num_empty_squares())
+        if not state.empty_squares():
+            return 0 #a tie has a neutral score of 0
+        if depth == 0:
+            return self.evaluate(state, player) #the search stops here, so the position is judged by its open lines
+
+        other_player = 'O' if player == 'X' else 'X'
+        best = -float('inf')
+        for move in self.ordered_moves(state, player, self.candidate_moves(state)):
+            state.make_move(move, player)
+            try:
+                score = -self.negamax(state, other_player, depth - 1, -beta, -alpha)
+            finally:
+                state.undo_move(move)
+            if score > best:
+                best = score
+                alpha = max(alpha, score)
+                if alpha >= beta:
+                    break #the opponent would never allow this position, so the remaining moves are skipped
+        return best
+
+    def candidate_moves(self, state):
+        #this method returns the empty squares next to a letter already on the board, which are the only ones worth trying
+        #on a large board; on an empty board it returns the center
+        taken = state.x_mask | state.o_mask
+        if not taken:
+            return [state.geometry.center_order[0]]
+        near = 0
+        neighbors = state.geometry.neighbors
+        remaining = taken
+        while remaining:
+            low = remaining & -remaining
+            near |= neighbors[low.bit_length() - 1]
+            remaining ^= low
+        near &= ~taken
+        moves = []
+        while near:
+            low = near & -near
+            moves.append(low.bit_length() - 1)
+            near ^= low
+        return moves
+
+    def evaluate(self, state, player):
+        #this method judges a position by its open lines: a line holding only one player's letters can still be completed
+        #by that player, and it's worth more the more letters it already has; lines holding both letters are worth nothing
+        own = state.x_mask if player == 'X' else state.o_mask
+        other = state.o_mask if player == 'X' else state.x_mask
+        score = 0
+        for line in state.geometry.lines:
+            mine = own & line
+            theirs = other & line
+            if mine and not theirs:
+                score += 10 ** mine.bit_count()
+            elif theirs and not mine:
+                score -= 10 ** theirs.bit_count()
+        return score
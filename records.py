@@ -0,0 +1,189 @@
+#this module saves finished games to a compact binary log and analyzes the log as a stream
+#the file starts with the 4 bytes 'TTTR' and a version byte, followed by one record per game:
+#  byte 0: kind of the 'X' player (high nibble) and of the 'O' player (low nibble): 0 human, 1 smart, 2 random, 3 other
+#  byte 1: board size (high nibble) and win length (low nibble)
+#  byte 2: 0x80 if 'O' made the first move, plus the number of moves (0 to 16)
+#  then the moves, one nibble each (the first move in the high nibble), padded to a whole byte
+#so a full classic game takes 8 bytes; boards larger than 4x4 don't fit in a nibble and can't be recorded
+#usage example: python records.py games.ttr --openings 2 --top 10
+import argparse #here is imported argparse to read the command line options
+import os #here is imported os to check if the log already exists
+from collections import Counter, namedtuple #here are imported the counter used by the analysis and the record type
+from board import Board #here is imported the headless game state, used to replay the games
+from book import shared_book #here is imported the table of solved positions, used to find the best moves quickly
+
+MAGIC = b'TTTR' #here are the bytes every log starts with
+VERSION = 1 #here is the version of the record layout
+KINDS = ('human', 'smart', 'random', 'other') #here are the kinds of player a record can name, by their code
+LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'games.ttr') #default location of the log
+
+#this is one recorded game: the kinds of the two players, the board size, the letter that moved first and the moves
+GameRecord = namedtuple('GameRecord', 'x_kind o_kind size win_length first moves')
+
+def player_kind(player):
+    #this function returns the kind of a player object, or 'human' for None
+    if player is None:
+        return 'human'
+    name = type(player).__name__
+    if name == 'SmartComputerPlayer':
+        return 'smart'
+    if name == 'RandomComputerPlayer':
+        return 'random'
+    return 'other'
+
+def encode(record):
+    #this function returns the bytes of one record
+    if record.size * record.size > 16:
+        raise ValueError("only boards up to 4x4 can be recorded, since every move takes a single nibble")
+    moves = list(record.moves)
+    data = bytearray((
+        KINDS.index(record.x_kind) << 4 | KINDS.index(record.o_kind),
+        record.size << 4 | record.win_length,
+        (0x80 if record.first == 'O' else 0) | len(moves),
+    ))
+    if len(moves) % 2:
+        moves.append(0) #the last byte is padded with an empty nibble
+    data.extend(moves[i] << 4 | moves[i + 1] for i in range(0, len(moves), 2))
+    return bytes(data)
+
+#this class appends records to a log file
+class GameLog:
+    def __init__(self, path=LOG_PATH):
+        self.path = path #here is stored the location of the log
+
+    def append(self, record):
+        #this method adds one finished game at the end of the log, writing the file header first if the log is new
+        data = encode(record)
+        with open(self.path, 'ab') as f:
+            if f.tell() == 0:
+                f.write(MAGIC + bytes([VERSION]))
+            f.write(data)
+
+    def extend(self, records):
+        #this method adds many finished games at once
+        data = b''.join(encode(record) for record in records)
+        with open(self.path, 'ab') as f:
+            if f.tell() == 0:
+                f.write(MAGIC + bytes([VERSION]))
+            f.write(data)
+
+def read_records(path):
+    #this generator yields the records of a log one at a time, reading the file through a small buffer,
+    #so logs of any size can be processed without loading them into memory
+    with open(path, 'rb') as f:
+        if f.read(5) != MAGIC + bytes([VERSION]):
+            raise ValueError(f"{path} is not a game log of version {VERSION}")
+        while True:
+            offset = f.tell() #here is remembered where the record starts, to name it in error messages
+            header = f.read(3)
+            if len(header) < 3:
+                return #the end of the log (or a record cut short by a crash, which is skipped)
+            x_code, o_code = header[0] >> 4, header[0] & 0x0F
+            size, win_length = header[1] >> 4, header[1] & 0x0F
+            count = header[2] & 0x7F
+            #here the fields are checked, so a corrupt log is reported instead of producing impossible games
+            if x_code >= len(KINDS) or o_code >= len(KINDS):
+                raise ValueError(f"{path}: unknown player kind in the record at byte {offset}")
+            if not 3 <= size <= 4 or not 3 <= win_length <= size:
+                raise ValueError(f"{path}: a {size}x{size} board with {win_length} in a row can't be recorded, in the record at byte {offset}")
+            if count > size * size:
+                raise ValueError(f"{path}: {count} moves don't fit a {size}x{size} board in the record at byte {offset}")
+            packed = f.read((count + 1) // 2)
+            if len(packed) < (count + 1) // 2:
+                return
+            moves = []
+            for byte in packed:
+                moves.append(byte >> 4)
+                moves.append(byte & 0x0F)
+            moves = moves[:count]
+            if any(move >= size * size for move in moves):
+                raise ValueError(f"{path}: a move is outside the {size}x{size} board in the record at byte {offset}")
+            #here the game is played through, so every move must land on an empty square before the game has ended
+            first = 'O' if header[2] & 0x80 else 'X'
+            state = Board(size, win_length)
+            letter = first
+            for move in moves:
+                if state.current_winner is not None:
+                    raise ValueError(f"{path}: a move comes after the game was won in the record at byte {offset}")
+                if not state.make_move(move, letter):
+                    raise ValueError(f"{path}: square {move} is played twice in the record at byte {offset}")
+                letter = 'O' if letter == 'X' else 'X'
+            yield GameRecord(KINDS[x_code], KINDS[o_code], size, win_length, first, moves)
+
+def replay(records):
+    #this generator replays every record, yielding the record, the final board and every move with the board before it
+    for record in records:
+        state = Board(record.size, record.win_length)
+        letter = record.first
+        steps = []
+        for move in record.moves:
+            steps.append((state.copy(), letter, move))
+            state.make_move(move, letter)
+            letter = 'O' if letter == 'X' else 'X'
+        yield record, state, steps
+
+def best_score(state, letter, searchers):
+    #this function returns the score of the position for the letter to move with perfect play (same scale as minimax)
+    if state.current_winner is not None:
+        return -(state.num_empty_squares() + 1) #the previous move won, so the letter to move has lost
+    if not state.empty_squares():
+        return 0
+    entry = shared_book.lookup(state, letter) if state.classic else None
+    if entry is not None:
+        return entry[1]
+    if letter not in searchers:
+        from player import SmartComputerPlayer #imported here because it's only needed when the table is missing
+        searchers[letter] = SmartComputerPlayer(letter, search='alphabeta', book=None)
+    return searchers[letter].alphabeta(state.copy(), letter)['score']
+
+def analyze(records, opening_length=2):
+    #this function goes once through the records and returns the outcome statistics, the frequencies of the openings
+    #and the positions where a human player chose a move worse than the minimax-optimal one
+    outcomes = Counter() #here is counted each result per pair of player kinds
+    openings = Counter() #here is counted each sequence of first moves
+    deviations = Counter() #here is counted each position where a human played a worse move than the best one
+    human_moves = 0
+    searchers = {}
+    for record, final, steps in replay(records):
+        winner = final.current_winner or 'tie'
+        outcomes[(record.x_kind, record.o_kind, winner)] += 1
+        openings[tuple(record.moves[:opening_length])] += 1
+        if record.size * record.size > 9 and 'human' in (record.x_kind, record.o_kind):
+            continue #larger boards can't be solved exactly, so their human moves aren't judged
+        for state, letter, move in steps:
+            if (record.x_kind if letter == 'X' else record.o_kind) != 'human':
+                continue
+            human_moves += 1
+            best = best_score(state, letter, searchers)
+            after = state.copy()
+            after.make_move(move, letter)
+            played = -best_score(after, 'O' if letter == 'X' else 'X', searchers)
+            if played < best:
+                deviations[(state.x_mask, state.o_mask, state.size, letter, move)] += 1
+    return {'outcomes': outcomes, 'openings': openings, 'deviations': deviations, 'human_moves': human_moves}
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze a log of recorded Tic Tac Toe games.")
+    parser.add_argument('path', nargs='?', default=LOG_PATH, help="game log to analyze")
+    parser.add_argument('--openings', type=int, default=2, help="number of first moves that make up an opening")
+    parser.add_argument('--top', type=int, default=10, help="number of openings and deviations to show")
+    args = parser.parse_args()
+
+    result = analyze(read_records(args.path), args.openings)
+    games = sum(result['outcomes'].values())
+    print(f"{games} games")
+    for (x_kind, o_kind, winner), count in sorted(result['outcomes'].items()):
+        print(f"  X={x_kind:6} O={o_kind:6} {'winner ' + winner if winner != 'tie' else 'tie':9} {count:10} ({count / games:.1%})")
+    print(f"most frequent openings (first {args.openings} moves):")
+    for opening, count in result['openings'].most_common(args.top):
+        print(f"  {' '.join(map(str, opening)):12} {count:10} ({count / games:.1%})")
+    total = sum(result['deviations'].values())
+    print(f"human moves worse than the best move: {total} of {result['human_moves']}")
+    for (x_mask, o_mask, size, letter, move), count in result['deviations'].most_common(args.top):
+        state = Board(size)
+        state.x_mask, state.o_mask = x_mask, o_mask
+        print(f"  {count} times, {letter} to move played {move}:")
+        print('    ' + str(state).replace('\n', '\n    '))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+#this module hosts many Tic Tac Toe games at once over TCP, each against a smart or a random AI
+#the protocol is one text line per command and one text line per reply:
+#  NEW <smart|random> [X|O] [size] [win_length]  ->  OK <your letter> <size> <win_length> [AI <square>]
+#  MOVE <square>                                  ->  AI <square> | AI <square> END LOSS|TIE | END WIN|TIE
+#  STATS                                          ->  STATS <json> (moves_per_second is the average since the start)
+#  QUIT                                           ->  the connection is closed
+#'X' always moves first, so when the client plays 'O' the reply to NEW already contains the AI's first move
+#errors are answered with ERR <message> and leave the game as it was
+#usage example: python server.py --port 8765 --workers 4
+import argparse #here is imported argparse to read the command line options
+import asyncio #here is imported asyncio, which serves all the connections from a single thread
+import json #here is imported json to send the statistics
+import sys #here is imported sys to print the periodic report
+import time #here is imported time to measure the move latencies
+from collections import deque #here is imported deque to keep only the latest latencies
+from concurrent.futures import ProcessPoolExecutor #here is imported the process pool that runs the searches
+from board import Board, MAX_SIZE #here are imported the headless game state and the largest supported board size
+from book import shared_book #here is imported the table of solved positions, used to answer classic moves right away
+from player import SmartComputerPlayer, RandomComputerPlayer #here are imported the AI players
+
+STRATEGIES = {'smart': SmartComputerPlayer, 'random': RandomComputerPlayer} #here are the AIs a client can play against
+LATENCY_WINDOW = 10000 #here is the number of latest move latencies the percentiles are computed over
+
+#here are kept the players of a worker process, one per strategy, letter and time limit, so they're only created once
+worker_players = {}
+
+def search_move(strategy, letter, size, win_length, x_mask, o_mask, time_limit):
+    #this function runs in a worker process and returns the AI's move for the board described by the two masks
+    key = (strategy, letter, time_limit)
+    if key not in worker_players:
+        worker_players[key] = SmartComputerPlayer(letter, time_limit=time_limit) if strategy == 'smart' else STRATEGIES[strategy](letter)
+    state = Board(size, win_length)
+    state.x_mask, state.o_mask = x_mask, o_mask
+    return worker_players[key].get_move(state)
+
+def parse_int(text, name):
+    #this function reads a non-negative integer sent by a client, with an error message that never repeats the client's text
+    if not (text.isascii() and text.isdigit()):
+        raise ValueError(f"{name} must be an integer")
+    return int(text)
+
+#this class holds the state of one game; it has fixed attributes, so thousands of them take little memory
+class Session:
+    __slots__ = ('state', 'human', 'ai', 'strategy')
+
+    def __init__(self, strategy, human, size, win_length):
+        self.state = Board(size, win_length) #here is stored the board of the game
+        self.human = human #here is stored the client's letter
+        self.ai = 'O' if human == 'X' else 'X' #here is stored the AI's letter
+        self.strategy = strategy #here is stored the name of the AI strategy
+
+#this class counts what the server does, so its load can be measured
+class Metrics:
+    def __init__(self):
+        self.started = time.perf_counter() #here is stored when the server started
+        self.sessions = 0 #here is counted the number of open connections
+        self.total_sessions = 0 #here is counted the number of connections since the start
+        self.games = 0 #here is counted the number of games started
+        self.moves = 0 #here is counted the number of AI moves played
+        self.offloaded = 0 #here is counted the number of AI moves that were searched in the process pool
+        self.latencies = deque(maxlen=LATENCY_WINDOW) #here are stored the latest AI move latencies, in seconds
+
+    def snapshot(self):
+        #this method returns the metrics as a dictionary, with the average moves per second since the server started
+        #it doesn't change anything, so any number of callers can ask for it
+        now = time.perf_counter()
+        rate = self.moves / (now - self.started) if now > self.started else 0.0
+        latencies = sorted(self.latencies)
+        def percentile(fraction):
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1e6 if latencies else 0.0
+        return {
+            'uptime': now - self.started,
+            'sessions': self.sessions,
+            'total_sessions': self.total_sessions,
+            'games': self.games,
+            'moves': self.moves,
+            'offloaded_moves': self.offloaded,
+            'moves_per_second': rate,
+            'latency_us': {'p50': percentile(0.50), 'p90': percentile(0.90), 'p99': percentile(0.99)},
+        }
+
+#this class accepts the connections and plays the AI side of every game
+class GameServer:
+    def __init__(self, executor, time_limit=0.2):
+        self.executor = executor #here is stored the process pool the searches are sent to
+        self.time_limit = time_limit #here is stored how long a search may take on boards larger than 3x3
+        self.metrics = Metrics()
+        self.random_players = {letter: RandomComputerPlayer(letter) for letter in 'XO'} #random moves are picked right here
+
+    async def ai_move(self, session):
+        #this method finds the AI's move and plays it; cheap moves are found in the event loop, searches in the process pool
+        start = time.perf_counter()
+        state = session.state
+        if session.strategy == 'random':
+            move = self.random_players[session.ai].get_move(state)
+        else:
+            entry = shared_book.lookup(state, session.ai) if state.classic else None
+            if entry is not None:
+                move = entry[0] #the classic board is answered from the table of solved positions
+            else:
+                self.metrics.offloaded += 1
+                loop = asyncio.get_running_loop()
+                move = await loop.run_in_executor(self.executor, search_move, session.strategy, session.ai, state.size,
+                                                  state.win_length, state.x_mask, state.o_mask, self.time_limit)
+        state.make_move(move, session.ai)
+        self.metrics.moves += 1
+        self.metrics.latencies.append(time.perf_counter() - start)
+        return move
+
+    async def handle_new(self, arguments):
+        #this method starts a new game and returns it with the reply for the client
+        if not arguments or arguments[0] not in STRATEGIES:
+            raise ValueError(f"strategy must be one of: {', '.join(STRATEGIES)}")
+        human = arguments[1].upper() if len(arguments) > 1 else 'X'
+        if human not in ('X', 'O'):
+            raise ValueError("letter must be X or O")
+        size = parse_int(arguments[2], "size") if len(arguments) > 2 else 3
+        win_length = parse_int(arguments[3], "win length") if len(arguments) > 3 else size
+        #here the size is checked before any board is made, since the tables of a board grow exponentially with its size
+        if not 3 <= size <= MAX_SIZE or not 3 <= win_length <= size:
+            raise ValueError(f"size must be between 3 and {MAX_SIZE} and win length between 3 and the size")
+        session = Session(arguments[0], human, size, win_length)
+        self.metrics.games += 1
+        reply = f"OK {human} {session.state.size} {session.state.win_length}"
+        if session.ai == 'X':
+            reply += f" AI {await self.ai_move(session)}" #'X' moves first
+        return session, reply
+
+    async def handle_move(self, session, arguments):
+        #this method plays the client's move, then the AI's answer, and returns the reply for the client
+        if session is None or session.state.current_winner is not None or not session.state.empty_squares():
+            raise ValueError("no game in progress, send NEW first")
+        square = parse_int(arguments[0], "square") if arguments else -1
+        if not 0 <= square < session.state.num_squares or not session.state.make_move(square, session.human):
+            raise ValueError("illegal move")
+        if session.state.current_winner is not None:
+            return "END WIN"
+        if not session.state.empty_squares():
+            return "END TIE"
+        move = await self.ai_move(session)
+        if session.state.current_winner is not None:
+            return f"AI {move} END LOSS"
+        if not session.state.empty_squares():
+            return f"AI {move} END TIE"
+        return f"AI {move}"
+
+    async def handle_client(self, reader, writer):
+        #this method serves one connection, which plays any number of games one after the other
+        self.metrics.sessions += 1
+        self.metrics.total_sessions += 1
+        session = None
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    #the line is longer than the stream limit (64 KiB); the rest of it would be read as a new command,
+                    #so the client is told and the connection is closed
+                    writer.write(b"ERR line too long\n")
+                    await writer.drain()
+                    break
+                if not line:
+                    break #the client closed the connection
+                command, *arguments = line.decode('ascii', 'replace').split() or ['']
+                command = command.upper()
+                try:
+                    if command == 'NEW':
+                        session, reply = await self.handle_new(arguments)
+                    elif command == 'MOVE':
+                        reply = await self.handle_move(session, arguments)
+                    elif command == 'STATS':
+                        reply = 'STATS ' + json.dumps(self.metrics.snapshot())
+                    elif command == 'QUIT':
+                        break
+                    else:
+                        reply = "ERR unknown command"
+                except ValueError as error:
+                    reply = f"ERR {error}"
+                writer.write(reply.encode('ascii', 'replace') + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass #the client went away in the middle of a reply
+        finally:
+            self.metrics.sessions -= 1
+            writer.close()
+
+    async def report(self, interval):
+        #this method prints the metrics every interval seconds
+        #the rate over each interval is kept here, apart from the metrics, so STATS requests don't change it
+        last_time, last_moves = time.perf_counter(), self.metrics.moves
+        while True:
+            await asyncio.sleep(interval)
+            snapshot = self.metrics.snapshot()
+            now = time.perf_counter()
+            snapshot['interval_moves_per_second'] = (self.metrics.moves - last_moves) / (now - last_time)
+            last_time, last_moves = now, self.metrics.moves
+            print(json.dumps(snapshot), file=sys.stderr, flush=True)
+
+async def serve(host, port, workers, time_limit, report_interval):
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        server = GameServer(executor, time_limit)
+        listener = await asyncio.start_server(server.handle_client, host, port, backlog=4096)
+        print(f"serving on {host}:{port}", file=sys.stderr, flush=True)
+        reporter = asyncio.create_task(server.report(report_interval)) if report_interval > 0 else None
+        try:
+            async with listener:
+                await listener.serve_forever()
+        finally:
+            if reporter is not None:
+                reporter.cancel()
+
+def main():
+    parser = argparse.ArgumentParser(description="Host Tic Tac Toe games against the AI over TCP.")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on")
+    parser.add_argument('--port', type=int, default=8765, help="port to listen on")
+    parser.add_argument('--workers', type=int, default=None, help="processes running the searches (default: one per processor)")
+    parser.add_argument('--time-limit', type=float, default=0.2, help="seconds a search may take on boards larger than 3x3")
+    parser.add_argument('--report-interval', type=float, default=10.0, help="seconds between metric reports (0 disables them)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.time_limit, args.report_interval))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
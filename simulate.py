@@ -0,0 +1,194 @@
+#this module plays many games between two AI players without the GUI and reports the results
+#usage example: python simulate.py --x smart --o random --games 10000 --seed 1 --workers 4
+import argparse #here is imported argparse to read the command line options
+import os #here is imported os to find out how many processors are available
+import random #here is imported random to give every game its own fixed seed
+import time #here is imported time to measure how long games and moves take
+from concurrent.futures import ProcessPoolExecutor #here is imported the process pool that spreads the games over processors
+from board import Board #here is imported the headless game state
+from book import shared_book #here is imported the table of solved positions, to report whether the smart players use it
+from player import Player, SmartComputerPlayer, TranspositionTable #here are imported the base class of the players that can be simulated, and the smart player and its cache
+from records import GameLog, GameRecord, player_kind #here are imported the game log and its record type
+
+def player_classes():
+    #this function returns every Player subclass by name, so players added later can be simulated without changes here
+    #each class is registered under its full name and under a short name ('SmartComputerPlayer' is also 'smart')
+    classes = {}
+    pending = list(Player.__subclasses__())
+    while pending:
+        cls = pending.pop()
+        pending.extend(cls.__subclasses__())
+        classes[cls.__name__.lower()] = cls
+        short = cls.__name__.lower().replace('computerplayer', '').replace('player', '')
+        if short:
+            classes.setdefault(short, cls)
+    return classes
+
+def find_player(name):
+    #this function returns the Player subclass with the given name, or raises an error listing the valid names
+    classes = player_classes()
+    try:
+        return classes[name.lower()]
+    except KeyError:
+        raise argparse.ArgumentTypeError(f"unknown player '{name}', choose from: {', '.join(sorted(classes))}")
+
+def play_game(x_player, o_player, first, size=3, win_length=None, moves=None):
+    #this function plays one game between the two players and returns the winner ('X', 'O' or None for a tie)
+    #together with the time each move took, in seconds, as lists for 'X' and for 'O'
+    #if a list is given as moves, the squares played are appended to it
+    state = Board(size, win_length)
+    players = {'X': x_player, 'O': o_player}
+    latencies = {'X': [], 'O': []}
+    letter = first
+    while True:
+        start = time.perf_counter()
+        move = players[letter].get_move(state)
+        latencies[letter].append(time.perf_counter() - start)
+        state.make_move(move, letter)
+        if moves is not None:
+            moves.append(move)
+        if state.current_winner is not None:
+            return letter, latencies
+        if not state.empty_squares():
+            return None, latencies
+        letter = 'O' if letter == 'X' else 'X'
+
+def new_player(name, letter, use_book):
+    #this function creates a player for one game; smart players get a cache of their own and use the table of solved
+    #positions only if asked to, because both decide which of several equally good moves is played
+    cls = find_player(name)
+    if issubclass(cls, SmartComputerPlayer):
+        return cls(letter, table=TranspositionTable(), book=shared_book if use_book else None)
+    return cls(letter)
+
+def play_chunk(task):
+    #this function plays a range of games in a worker process and returns the totals and the move times of that range,
+    #and the records of the games if they are to be logged
+    x_name, o_name, first, seed, start, stop, size, win_length, log, use_book = task
+    results = {'X': 0, 'O': 0, None: 0}
+    latencies = {'X': [], 'O': []}
+    records = []
+    for index in range(start, stop):
+        #here every game gets its own seed and its own players (so no cache is carried over from earlier games),
+        #so the results don't depend on how the games were split among the processes
+        random.seed(seed * 1000003 + index)
+        x_player = new_player(x_name, 'X', use_book)
+        o_player = new_player(o_name, 'O', use_book)
+        if first == 'alternate':
+            letter = 'X' if index % 2 == 0 else 'O'
+        elif first == 'random':
+            letter = random.choice(['X', 'O']) #like the GUI, a random player goes first
+        else:
+            letter = first.upper()
+        moves = [] if log else None
+        winner, times = play_game(x_player, o_player, letter, size, win_length, moves)
+        if log:
+            records.append(GameRecord(player_kind(x_player), player_kind(o_player), size,
+                                      size if win_length is None else win_length, letter, moves))
+        results[winner] += 1
+        latencies['X'].extend(times['X'])
+        latencies['O'].extend(times['O'])
+    return results, latencies, records
+
+def percentile(values, fraction):
+    #this function returns the value below which the given fraction of the sorted values fall (nearest rank)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def simulate(x_name, o_name, games, seed=0, workers=None, chunk_size=100, first='random', size=3, win_length=None, log=None,
+             use_book=True):
+    #this function plays the games on a pool of processes and returns a dictionary with the results
+    #if a log path is given, the games are appended to that game log
+    #use_book lets smart players read moves from the table of solved positions, if it has been built
+    #the table only covers the classic board, is only read by smart players and is only used when every process can find it
+    classic = size == 3 and win_length in (None, 3)
+    has_smart = any(issubclass(find_player(name), SmartComputerPlayer) for name in (x_name, o_name))
+    use_book = use_book and classic and has_smart and shared_book.load()
+    game_log = GameLog(log) if log else None
+    tasks = [(x_name, o_name, first, seed, start, min(start + chunk_size, games), size, win_length, bool(log), use_book)
+             for start in range(0, games, chunk_size)]
+    results = {'X': 0, 'O': 0, None: 0}
+    latencies = {'X': [], 'O': []}
+    start = time.perf_counter()
+    if workers == 1:
+        chunks = map(play_chunk, tasks) #with a single worker the games are played in this process
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        chunks = pool.map(play_chunk, tasks)
+    try:
+        for chunk_results, chunk_latencies, chunk_records in chunks:
+            if game_log is not None:
+                game_log.extend(chunk_records) #the records are written here, so only one process writes to the log
+            for outcome, count in chunk_results.items():
+                results[outcome] += count
+            latencies['X'].extend(chunk_latencies['X'])
+            latencies['O'].extend(chunk_latencies['O'])
+    finally:
+        if workers != 1:
+            pool.shutdown()
+    elapsed = time.perf_counter() - start
+
+    summary = {
+        'games': games,
+        'book': use_book, #whether the smart players read their moves from the table of solved positions
+        'x_wins': results['X'] / games,
+        'o_wins': results['O'] / games,
+        'ties': results[None] / games,
+        'seconds': elapsed,
+        'games_per_second': games / elapsed if elapsed else float('inf'),
+        'latency': {},
+    }
+    #here are computed the move time percentiles of each player, in microseconds
+    for letter in ('X', 'O'):
+        times = sorted(latencies[letter])
+        summary['latency'][letter] = {
+            'moves': len(times),
+            'p50': percentile(times, 0.50) * 1e6,
+            'p90': percentile(times, 0.90) * 1e6,
+            'p99': percentile(times, 0.99) * 1e6,
+            'max': (times[-1] if times else 0.0) * 1e6,
+        }
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Play Tic Tac Toe games between two AI players without the GUI.")
+    parser.add_argument('--x', default='smart', help="player class for 'X' (for example smart or random)")
+    parser.add_argument('--o', default='random', help="player class for 'O' (for example smart or random)")
+    parser.add_argument('--games', type=int, default=1000, help="number of games to play")
+    parser.add_argument('--seed', type=int, default=0, help="seed that fixes the random choices of every game")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="number of processes (1 plays in this process)")
+    parser.add_argument('--chunk-size', type=int, default=100, help="number of games sent to a process at a time")
+    parser.add_argument('--size', type=int, default=3, help="number of rows and columns of the board")
+    parser.add_argument('--win-length', type=int, default=None, help="letters in a row needed to win (default: the board size)")
+    parser.add_argument('--no-book', action='store_true', help="make smart players search even if the table of solved positions exists")
+    parser.add_argument('--log', help="game log to append the played games to (boards up to 4x4)")
+    parser.add_argument('--first', choices=['x', 'o', 'alternate', 'random'], default='random', help="who makes the first move")
+    args = parser.parse_args()
+    if args.games < 1 or args.chunk_size < 1:
+        parser.error("--games and --chunk-size must be at least 1")
+    try:
+        Board(args.size, args.win_length)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.log and args.size > 4:
+        parser.error("only boards up to 4x4 can be logged")
+    for name in (args.x, args.o):
+        try:
+            find_player(name)
+        except argparse.ArgumentTypeError as error:
+            parser.error(str(error))
+
+    summary = simulate(args.x, args.o, args.games, args.seed, args.workers, args.chunk_size, args.first, args.size, args.win_length, args.log,
+                       not args.no_book)
+    print(f"{summary['games']} games on {args.size}x{args.size}, X={args.x} vs O={args.o}, first move: {args.first}, "
+          f"table of solved positions: {'used' if summary['book'] else 'not used'}")
+    print(f"X wins: {summary['x_wins']:.2%}  O wins: {summary['o_wins']:.2%}  ties: {summary['ties']:.2%}")
+    print(f"{summary['seconds']:.2f} s, {summary['games_per_second']:.0f} games/s")
+    for letter in ('X', 'O'):
+        stats = summary['latency'][letter]
+        print(f"{letter} move latency over {stats['moves']} moves: p50 {stats['p50']:.1f} us, "
+              f"p90 {stats['p90']:.1f} us, p99 {stats['p99']:.1f} us, max {stats['max']:.1f} us")
+
+if __name__ == '__main__':
+    main()